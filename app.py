@@ -1,14 +1,114 @@
 import os
 from flask import Flask, render_template, request, redirect, url_for, session
-from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
+from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user, user_logged_in
+from werkzeug.exceptions import HTTPException
 from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.middleware.proxy_fix import ProxyFix
 import psycopg2
 from psycopg2.extras import RealDictCursor
 import urllib.parse
+import hashlib
+import uuid
+from functools import wraps
+from jinja2 import FileSystemBytecodeCache
+from ratelimit import RateLimiter, Limit, MemoryBucketStore, SQLiteBucketStore, RedisBucketStore
+from sharedstore import store_from_url, SharedCache, StoreSessionInterface
+from jsonapi import ApiError, json_response, error_response, request_data, select_fields, page_args, page
 
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'dev-key-only-for-local-development')
 
+# Drop the indentation and newlines around block tags, which dominate large listing pages
+jinja_settings = {'trim_blocks': True, 'lstrip_blocks': True}
+
+# Compiled templates are cached on disk so restarted workers skip the Jinja compile step.
+# The cache is keyed on template source only, so the file names carry the settings too.
+# Cached bytecode is executed, so without JINJA_CACHE_DIR Jinja picks its own directory:
+# private to this user (mode 0700) and checked for ownership.
+jinja_cache_dir = os.environ.get('JINJA_CACHE_DIR') or None
+jinja_settings_tag = hashlib.md5(repr(sorted(jinja_settings.items())).encode()).hexdigest()[:8]
+if jinja_cache_dir:
+    os.makedirs(jinja_cache_dir, mode=0o700, exist_ok=True)
+    cache_dir_stat = os.stat(jinja_cache_dir)
+    if cache_dir_stat.st_uid != os.getuid() or cache_dir_stat.st_mode & 0o022:
+        raise RuntimeError(f"JINJA_CACHE_DIR {jinja_cache_dir} must be owned by this user "
+                           f"and not writable by others")
+app.jinja_options = {
+    **app.jinja_options,
+    **jinja_settings,
+    'bytecode_cache': FileSystemBytecodeCache(jinja_cache_dir, f'__jinja2_{jinja_settings_tag}_%s.cache'),
+}
+
+# Static assets: app files are fingerprinted by content, vendored libraries by versioned path,
+# so both can be cached by browsers for a year
+STATIC_MAX_AGE = 365 * 24 * 3600
+asset_hashes = {}
+
+@app.template_global()
+def asset_url(filename):
+    digest = None if app.debug else asset_hashes.get(filename)
+    if digest is None:
+        with open(os.path.join(app.static_folder, filename), 'rb') as f:
+            digest = hashlib.md5(f.read()).hexdigest()[:12]
+        asset_hashes[filename] = digest
+    return url_for('static', filename=filename, v=digest)
+
+@app.after_request
+def static_cache_headers(response):
+    if request.endpoint == 'static' and response.status_code in (200, 304) and (
+            request.args.get('v') or request.path.startswith('/static/vendor/')):
+        response.cache_control.public = True
+        response.cache_control.max_age = STATIC_MAX_AGE
+        response.cache_control.immutable = True
+        response.cache_control.no_cache = None
+    return response
+
+# Compile every template once at startup instead of on each worker's first request
+def warm_templates():
+    for name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(name)
+
+# Behind Render's proxy the client address arrives in X-Forwarded-For
+trusted_proxies = int(os.environ.get('TRUSTED_PROXIES', '0'))
+if trusted_proxies:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=trusted_proxies)
+
+# Shared state for running several instances: SHARED_STORE_URL=redis://... (any Redis-protocol
+# server) holds sessions, caches and rate-limit buckets; without it everything is per process
+shared_store = store_from_url(os.environ.get('SHARED_STORE_URL'))
+if shared_store.shared:
+    app.session_interface = StoreSessionInterface(shared_store)
+
+# Rate limiting: buckets go to the shared store if there is one, otherwise RATE_LIMIT_STORE
+# can point at a SQLite file shared by all workers on the host
+rate_limit_store_path = os.environ.get('RATE_LIMIT_STORE')
+if shared_store.shared:
+    rate_limit_store = RedisBucketStore(shared_store.client)
+elif rate_limit_store_path:
+    rate_limit_store = SQLiteBucketStore(rate_limit_store_path)
+else:
+    rate_limit_store = MemoryBucketStore()
+rate_limiter = RateLimiter(
+    store=rate_limit_store,
+    enabled=os.environ.get('RATE_LIMIT_ENABLED', '1') != '0'
+)
+
+# Password hashing is deliberately slow, so auth endpoints get tight per-IP limits
+AUTH_LIMIT = Limit(10, 60)
+# Login attempts per (username, client IP): guessing one account is slower than AUTH_LIMIT
+# allows, but only the guesser's own bucket empties, so nobody can lock another user out
+LOGIN_ACCOUNT_LIMIT = Limit(10, 300)
+# Listing and offer creation: per user, with a looser per-IP cap for shared campus NAT
+WRITE_USER_LIMIT = Limit(20, 60)
+WRITE_IP_LIMIT = Limit(60, 60)
+
+def login_attempt_key():
+    # Usernames are at most 50 characters; anything longer cannot match an account
+    username = request.form.get('username', '')[:50]
+    if not username:
+        return None
+    return f"{request.remote_addr or 'unknown'}:{username}"
+
 # PostgreSQL configuration
 def get_db_connection():
     database_url = os.environ.get('DATABASE_URL')
@@ -44,19 +144,36 @@ class User(UserMixin):
         self.username = username
         self.email = email
 
-@login_manager.user_loader
-def load_user(user_id):
+# load_user runs on every authenticated request; cache the row instead of opening a connection
+user_cache = SharedCache(shared_store, 'user', ttl=300)
+
+def fetch_user(user_id):
     conn = get_db_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
-    cur.execute('SELECT * FROM users WHERE id = %s', (user_id,))
+    cur.execute('SELECT id, username, email FROM users WHERE id = %s', (user_id,))
     user = cur.fetchone()
     cur.close()
     conn.close()
+    return dict(user) if user else None
+
+@login_manager.user_loader
+def load_user(user_id):
+    user = user_cache.get(user_id, lambda: fetch_user(user_id))
     
     if user:
         return User(user['id'], user['username'], user['email'])
     return None
 
+@user_logged_in.connect_via(app)
+def rotate_session_id(sender, user):
+    if isinstance(app.session_interface, StoreSessionInterface):
+        app.session_interface.rotate(session)
+
+# Retried writes carrying the same key within this window return the original result
+IDEMPOTENCY_TTL_HOURS = 24
+# Expired keys removed by each claim, so the table stays at about a day of writes
+IDEMPOTENCY_PURGE_BATCH = 100
+
 # Initialize database tables
 def init_db():
     conn = get_db_connection()
@@ -135,6 +252,120 @@ def init_db():
             )
         ''')
         
+        # Per-hostel feeds: partial indexes hold only active listings, ordered the way feeds read them
+        cur.execute('''
+            CREATE INDEX IF NOT EXISTS barters_active_hostel_idx
+            ON barters (hostel, created_at DESC) WHERE is_active = TRUE
+        ''')
+        cur.execute('''
+            CREATE INDEX IF NOT EXISTS requests_active_hostel_idx
+            ON requests (hostel, created_at DESC) WHERE is_active = TRUE
+        ''')
+        
+        # Active listing counts per hostel, kept current by triggers instead of counting on every page
+        cur.execute('''
+            CREATE TABLE IF NOT EXISTS hostel_listing_counts (
+                hostel VARCHAR(10) NOT NULL,
+                kind VARCHAR(10) NOT NULL,
+                active_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (hostel, kind)
+            )
+        ''')
+        cur.execute('''
+            CREATE OR REPLACE FUNCTION update_hostel_listing_counts() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP <> 'INSERT' THEN
+                    IF OLD.is_active THEN
+                        UPDATE hostel_listing_counts SET active_count = active_count - 1
+                        WHERE hostel = OLD.hostel AND kind = TG_TABLE_NAME;
+                    END IF;
+                END IF;
+                IF TG_OP <> 'DELETE' THEN
+                    IF NEW.is_active THEN
+                        INSERT INTO hostel_listing_counts (hostel, kind, active_count)
+                        VALUES (NEW.hostel, TG_TABLE_NAME, 1)
+                        ON CONFLICT (hostel, kind)
+                        DO UPDATE SET active_count = hostel_listing_counts.active_count + 1;
+                    END IF;
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        ''')
+        # Create the triggers only when missing: DROP TRIGGER would lock the table against reads on every boot
+        cur.execute('''
+            DO $$
+            BEGIN
+                IF NOT EXISTS (SELECT 1 FROM pg_trigger
+                               WHERE tgrelid = 'barters'::regclass AND tgname = 'barters_count_write') THEN
+                    CREATE TRIGGER barters_count_write
+                    AFTER INSERT OR DELETE ON barters
+                    FOR EACH ROW EXECUTE FUNCTION update_hostel_listing_counts();
+                END IF;
+                IF NOT EXISTS (SELECT 1 FROM pg_trigger
+                               WHERE tgrelid = 'barters'::regclass AND tgname = 'barters_count_update') THEN
+                    CREATE TRIGGER barters_count_update
+                    AFTER UPDATE OF hostel, is_active ON barters
+                    FOR EACH ROW
+                    WHEN (OLD.hostel IS DISTINCT FROM NEW.hostel OR OLD.is_active IS DISTINCT FROM NEW.is_active)
+                    EXECUTE FUNCTION update_hostel_listing_counts();
+                END IF;
+            END
+            $$
+        ''')
+        cur.execute('''
+            DO $$
+            BEGIN
+                IF NOT EXISTS (SELECT 1 FROM pg_trigger
+                               WHERE tgrelid = 'requests'::regclass AND tgname = 'requests_count_write') THEN
+                    CREATE TRIGGER requests_count_write
+                    AFTER INSERT OR DELETE ON requests
+                    FOR EACH ROW EXECUTE FUNCTION update_hostel_listing_counts();
+                END IF;
+                IF NOT EXISTS (SELECT 1 FROM pg_trigger
+                               WHERE tgrelid = 'requests'::regclass AND tgname = 'requests_count_update') THEN
+                    CREATE TRIGGER requests_count_update
+                    AFTER UPDATE OF hostel, is_active ON requests
+                    FOR EACH ROW
+                    WHEN (OLD.hostel IS DISTINCT FROM NEW.hostel OR OLD.is_active IS DISTINCT FROM NEW.is_active)
+                    EXECUTE FUNCTION update_hostel_listing_counts();
+                END IF;
+            END
+            $$
+        ''')
+        
+        # Backfill once, the first time the counts table exists alongside listings
+        cur.execute('''
+            INSERT INTO hostel_listing_counts (hostel, kind, active_count)
+            SELECT hostel, kind, n FROM (
+                SELECT hostel, 'barters' AS kind, COUNT(*) AS n FROM barters WHERE is_active = TRUE GROUP BY hostel
+                UNION ALL
+                SELECT hostel, 'requests', COUNT(*) FROM requests WHERE is_active = TRUE GROUP BY hostel
+            ) counts
+            WHERE NOT EXISTS (SELECT 1 FROM hostel_listing_counts)
+        ''')
+        
+        # Idempotency keys for write endpoints; one row per (user, key) makes retries no-ops
+        cur.execute('''
+            CREATE TABLE IF NOT EXISTS idempotency_keys (
+                user_id INTEGER NOT NULL,
+                key VARCHAR(255) NOT NULL,
+                endpoint VARCHAR(255) NOT NULL,
+                result_id INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (user_id, key),
+                FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+            )
+        ''')
+        cur.execute('''
+            CREATE INDEX IF NOT EXISTS idempotency_keys_created_at_idx
+            ON idempotency_keys (created_at)
+        ''')
+        cur.execute(
+            'DELETE FROM idempotency_keys WHERE created_at < NOW() - %s * INTERVAL \'1 hour\'',
+            (IDEMPOTENCY_TTL_HOURS,)
+        )
+        
         conn.commit()
         print("✅ Database tables created successfully")
         
@@ -150,6 +381,7 @@ init_db()
 
 # --- Authentication Routes ---
 @app.route("/login", methods=["GET", "POST"])
+@rate_limiter.limit(per_ip=AUTH_LIMIT, per_account=LOGIN_ACCOUNT_LIMIT, account=login_attempt_key)
 def login():
     if current_user.is_authenticated:
         return redirect(url_for("index"))
@@ -181,6 +413,7 @@ def logout():
     return redirect(url_for("login"))
 
 @app.route("/register", methods=["GET", "POST"])
+@rate_limiter.limit(per_ip=AUTH_LIMIT)
 def register():
     if current_user.is_authenticated:
         return redirect(url_for("index"))
@@ -228,53 +461,130 @@ def register():
     
     return render_template("register.html")
 
+# --- Idempotent Writes ---
+@app.template_global()
+def new_idempotency_key():
+    return uuid.uuid4().hex
+
+KEY_REUSED_MESSAGE = "Idempotency-Key was already used for a different request"
+
+def get_idempotency_key():
+    key = request.headers.get('Idempotency-Key') or request.form.get('idempotency_key')
+    if key and len(key) <= 255:
+        return key
+    return None
+
+def claim_idempotency_key(cur, key):
+    """Reserve key for the current user in the open transaction.
+
+    Returns None if the key is new: the caller does its write, calls
+    record_idempotent_result() and commits. Otherwise returns the earlier
+    row (endpoint, result_id); a concurrent request with the same key waits
+    on the primary key until the first one commits or rolls back.
+    """
+    cur.execute('''
+        DELETE FROM idempotency_keys
+        WHERE user_id = %s AND key = %s AND created_at < NOW() - %s * INTERVAL '1 hour'
+    ''', (current_user.id, key, IDEMPOTENCY_TTL_HOURS))
+    # Clear out a few other expired keys too; SKIP LOCKED keeps concurrent writers from queueing
+    cur.execute('''
+        DELETE FROM idempotency_keys
+        WHERE (user_id, key) IN (
+            SELECT user_id, key FROM idempotency_keys
+            WHERE created_at < NOW() - %s * INTERVAL '1 hour'
+            ORDER BY created_at
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        )
+    ''', (IDEMPOTENCY_TTL_HOURS, IDEMPOTENCY_PURGE_BATCH))
+    cur.execute('''
+        INSERT INTO idempotency_keys (user_id, key, endpoint)
+        VALUES (%s, %s, %s)
+        ON CONFLICT (user_id, key) DO NOTHING
+        RETURNING key
+    ''', (current_user.id, key, request.path))
+    if cur.fetchone():
+        return None
+    
+    cur.execute(
+        'SELECT endpoint, result_id FROM idempotency_keys WHERE user_id = %s AND key = %s',
+        (current_user.id, key)
+    )
+    return cur.fetchone()
+
+def key_reused_elsewhere(previous):
+    return previous['endpoint'] != request.path
+
+def record_idempotent_result(cur, key, result_id):
+    cur.execute(
+        'UPDATE idempotency_keys SET result_id = %s WHERE user_id = %s AND key = %s',
+        (result_id, current_user.id, key)
+    )
+
 # --- Trade Offer Routes ---
+def insert_trade_offer(cur, barter_id, name, mobile, item_description):
+    """Create a trade offer and its received copy; returns the offer id, or None if the barter is gone."""
+    # Get barter details and owner info
+    cur.execute('''
+        SELECT b.*, u.username, u.id as owner_id 
+        FROM barters b 
+        JOIN users u ON b.user_id = u.id 
+        WHERE b.id = %s AND b.is_active = TRUE
+    ''', (barter_id,))
+    
+    barter = cur.fetchone()
+    
+    if not barter:
+        return None
+    
+    print(f"Creating trade offer for barter {barter_id} by user {current_user.id}")
+    print(f"Barter owner: {barter['owner_id']}")
+    
+    # Create trade offer
+    cur.execute('''
+        INSERT INTO trade_offers 
+        (barter_id, user_id, barter_item, barter_owner, offerer_name, offerer_mobile, item_description) 
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        RETURNING id
+    ''', (barter_id, current_user.id, barter['item'], barter['username'], name, mobile, item_description))
+    
+    trade_offer_id = cur.fetchone()['id']
+    print(f"Created trade offer with ID: {trade_offer_id}")
+    
+    # Create received trade offer for the item owner
+    cur.execute('''
+        INSERT INTO received_trade_offers (trade_offer_id, receiver_user_id)
+        VALUES (%s, %s)
+    ''', (trade_offer_id, barter['owner_id']))
+    
+    return trade_offer_id
+
 @app.route("/create_trade_offer/<int:barter_id>", methods=["POST"])
+@rate_limiter.limit(per_ip=WRITE_IP_LIMIT, per_user=WRITE_USER_LIMIT)
 @login_required
 def create_trade_offer(barter_id):
     conn = get_db_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
     
     try:
-        # Get barter details and owner info
-        cur.execute('''
-            SELECT b.*, u.username, u.id as owner_id 
-            FROM barters b 
-            JOIN users u ON b.user_id = u.id 
-            WHERE b.id = %s AND b.is_active = TRUE
-        ''', (barter_id,))
-        
-        barter = cur.fetchone()
-        
-        if not barter:
-            cur.close()
-            conn.close()
+        key = get_idempotency_key()
+        previous = claim_idempotency_key(cur, key) if key else None
+        if previous:
+            if key_reused_elsewhere(previous):
+                return KEY_REUSED_MESSAGE, 422
+            print(f"Replayed trade offer request for barter {barter_id} (key {key})")
             return redirect(url_for("index"))
         
-        name = request.form["name"]
-        mobile = request.form["mobile"]
-        item_description = request.form["item_description"]
-        
-        print(f"Creating trade offer for barter {barter_id} by user {current_user.id}")
-        print(f"Barter owner: {barter['owner_id']}")
-        
-        # Create trade offer
-        cur.execute('''
-            INSERT INTO trade_offers 
-            (barter_id, user_id, barter_item, barter_owner, offerer_name, offerer_mobile, item_description) 
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-            RETURNING id
-        ''', (barter_id, current_user.id, barter['item'], barter['username'], name, mobile, item_description))
-        
-        trade_offer_id = cur.fetchone()['id']
-        print(f"Created trade offer with ID: {trade_offer_id}")
+        trade_offer_id = insert_trade_offer(
+            cur, barter_id,
+            request.form["name"], request.form["mobile"], request.form["item_description"]
+        )
         
-        # Create received trade offer for the item owner
-        cur.execute('''
-            INSERT INTO received_trade_offers (trade_offer_id, receiver_user_id)
-            VALUES (%s, %s)
-        ''', (trade_offer_id, barter['owner_id']))
+        if trade_offer_id is None:
+            return redirect(url_for("index"))
         
+        if key:
+            record_idempotent_result(cur, key, trade_offer_id)
         conn.commit()
         print("Trade offer committed successfully")
         
@@ -364,6 +674,33 @@ def view_received_offers():
     
     return render_template("received_offers.html", received_offers=received_offers)
 
+def set_offer_status(cur, received_offer_id, status):
+    """Update a received offer owned by the current user; returns False if there is no such offer."""
+    # Update received offer status
+    cur.execute('''
+        UPDATE received_trade_offers 
+        SET status = %s 
+        WHERE id = %s AND receiver_user_id = %s
+        RETURNING trade_offer_id
+    ''', (status, received_offer_id, current_user.id))
+    
+    result = cur.fetchone()
+    if not result:
+        return False
+    
+    trade_offer_id = result['trade_offer_id']
+    print(f"Updated received offer, trade_offer_id: {trade_offer_id}")
+    
+    # Also update the main trade offer status
+    if status in ['accepted', 'rejected']:
+        cur.execute('''
+            UPDATE trade_offers 
+            SET status = %s 
+            WHERE id = %s
+        ''', (status, trade_offer_id))
+        print(f"Updated trade_offer {trade_offer_id} to {status}")
+    return True
+
 @app.route("/update_offer_status/<int:received_offer_id>/<string:status>")
 @login_required
 def update_offer_status(received_offer_id, status):
@@ -372,29 +709,7 @@ def update_offer_status(received_offer_id, status):
     
     try:
         print(f"Updating offer {received_offer_id} to status: {status}")
-        
-        # Update received offer status
-        cur.execute('''
-            UPDATE received_trade_offers 
-            SET status = %s 
-            WHERE id = %s AND receiver_user_id = %s
-            RETURNING trade_offer_id
-        ''', (status, received_offer_id, current_user.id))
-        
-        result = cur.fetchone()
-        if result:
-            trade_offer_id = result['trade_offer_id']
-            print(f"Updated received offer, trade_offer_id: {trade_offer_id}")
-            
-            # Also update the main trade offer status
-            if status in ['accepted', 'rejected']:
-                cur.execute('''
-                    UPDATE trade_offers 
-                    SET status = %s 
-                    WHERE id = %s
-                ''', (status, trade_offer_id))
-                print(f"Updated trade_offer {trade_offer_id} to {status}")
-        
+        set_offer_status(cur, received_offer_id, status)
         conn.commit()
         print("Status update committed successfully")
         
@@ -408,32 +723,75 @@ def update_offer_status(received_offer_id, status):
     return redirect(url_for("view_received_offers"))
 
 # --- Protected Routes ---
-@app.route("/")
-@login_required
-def index():
+HOSTELS = ['A', 'B', 'C', 'D', 'E', 'G', 'I', 'J', 'K', 'L', 'M', 'N', 'O', 'PG', 'Q']
+
+# Read on every feed page; listing writes invalidate it on every instance
+hostel_count_cache = SharedCache(shared_store, 'hostel_counts', ttl=60)
+
+def load_hostel_counts(cur):
+    """Active barters/requests per hostel from the trigger-maintained counts table."""
+    cur.execute('SELECT hostel, kind, active_count FROM hostel_listing_counts')
+    counts = {}
+    for row in cur.fetchall():
+        counts.setdefault(row['hostel'], {'barters': 0, 'requests': 0})[row['kind']] = row['active_count']
+    return counts
+
+def cached_hostel_counts(cur):
+    return hostel_count_cache.get('all', lambda: load_hostel_counts(cur))
+
+def listings_changed():
+    hostel_count_cache.invalidate('all')
+
+def render_feed(hostel=None):
     conn = get_db_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
     
     try:
-        # Get barters with usernames
-        cur.execute('''
-            SELECT b.*, u.username 
-            FROM barters b 
-            JOIN users u ON b.user_id = u.id 
-            WHERE b.is_active = TRUE 
-            ORDER BY b.created_at DESC
-        ''')
-        barters = cur.fetchall()
+        if hostel:
+            # Single hostel: served from the partial (hostel, created_at) indexes
+            cur.execute('''
+                SELECT b.*, u.username,
+                       lower(b.name || ' ' || b.item || ' ' || b.hostel) AS search_text
+                FROM barters b 
+                JOIN users u ON b.user_id = u.id 
+                WHERE b.is_active = TRUE AND b.hostel = %s
+                ORDER BY b.created_at DESC
+            ''', (hostel,))
+            barters = cur.fetchall()
+            
+            cur.execute('''
+                SELECT r.*, u.username,
+                       lower(r.name || ' ' || r.item || ' ' || r.hostel) AS search_text
+                FROM requests r 
+                JOIN users u ON r.user_id = u.id 
+                WHERE r.is_active = TRUE AND r.hostel = %s
+                ORDER BY r.created_at DESC
+            ''', (hostel,))
+            requests = cur.fetchall()
+        else:
+            # Get barters with usernames
+            cur.execute('''
+                SELECT b.*, u.username,
+                       lower(b.name || ' ' || b.item || ' ' || b.hostel) AS search_text
+                FROM barters b 
+                JOIN users u ON b.user_id = u.id 
+                WHERE b.is_active = TRUE 
+                ORDER BY b.created_at DESC
+            ''')
+            barters = cur.fetchall()
+            
+            # Get requests with usernames
+            cur.execute('''
+                SELECT r.*, u.username,
+                       lower(r.name || ' ' || r.item || ' ' || r.hostel) AS search_text
+                FROM requests r 
+                JOIN users u ON r.user_id = u.id 
+                WHERE r.is_active = TRUE 
+                ORDER BY r.created_at DESC
+            ''')
+            requests = cur.fetchall()
         
-        # Get requests with usernames
-        cur.execute('''
-            SELECT r.*, u.username 
-            FROM requests r 
-            JOIN users u ON r.user_id = u.id 
-            WHERE r.is_active = TRUE 
-            ORDER BY r.created_at DESC
-        ''')
-        requests = cur.fetchall()
+        hostel_counts = cached_hostel_counts(cur)
         
         # Get user's trade offers count
         cur.execute('SELECT COUNT(*) FROM trade_offers WHERE user_id = %s', (current_user.id,))
@@ -452,20 +810,51 @@ def index():
         print(f"Error loading index data: {e}")
         barters = []
         requests = []
+        hostel_counts = {}
         trade_offers_count = 0
         pending_received_offers_count = 0
     finally:
         cur.close()
         conn.close()
     
+    # Stat cards come from the precomputed counts rather than len() of the fetched rows
+    scope = [hostel_counts.get(hostel, {})] if hostel else hostel_counts.values()
+    barter_count = sum(c.get('barters', 0) for c in scope)
+    request_count = sum(c.get('requests', 0) for c in scope)
+    
     return render_template("index.html", 
                          barters=barters, 
                          requests=requests, 
                          username=current_user.username,
+                         hostel=hostel,
+                         hostels=HOSTELS,
+                         hostel_counts=hostel_counts,
+                         barter_count=barter_count,
+                         request_count=request_count,
                          trade_offers_count=trade_offers_count,
                          pending_received_offers_count=pending_received_offers_count)
 
+@app.route("/")
+@login_required
+def index():
+    return render_feed()
+
+@app.route("/hostel/<string:hostel>")
+@login_required
+def hostel_feed(hostel):
+    if hostel not in HOSTELS:
+        return redirect(url_for("index"))
+    return render_feed(hostel)
+
+def feed_url():
+    """The hostel feed a listing form was posted from, or the main page."""
+    hostel = request.form.get('feed_hostel')
+    if hostel in HOSTELS:
+        return url_for("hostel_feed", hostel=hostel)
+    return url_for("index")
+
 @app.route("/create_barter", methods=["POST"])
+@rate_limiter.limit(per_ip=WRITE_IP_LIMIT, per_user=WRITE_USER_LIMIT)
 @login_required
 def create_barter():
     name = request.form["name"]
@@ -474,14 +863,24 @@ def create_barter():
     hostel = request.form["hostel"]
 
     conn = get_db_connection()
-    cur = conn.cursor()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
     
     try:
+        key = get_idempotency_key()
+        previous = claim_idempotency_key(cur, key) if key else None
+        if previous:
+            if key_reused_elsewhere(previous):
+                return KEY_REUSED_MESSAGE, 422
+            return redirect(feed_url())
+        
         cur.execute(
-            'INSERT INTO barters (user_id, name, mobile, item, hostel) VALUES (%s, %s, %s, %s, %s)',
+            'INSERT INTO barters (user_id, name, mobile, item, hostel) VALUES (%s, %s, %s, %s, %s) RETURNING id',
             (current_user.id, name, mobile, item, hostel)
         )
+        if key:
+            record_idempotent_result(cur, key, cur.fetchone()['id'])
         conn.commit()
+        listings_changed()
     except Exception as e:
         print(f"Error creating barter: {e}")
         conn.rollback()
@@ -489,9 +888,10 @@ def create_barter():
         cur.close()
         conn.close()
 
-    return redirect(url_for("index"))
+    return redirect(feed_url())
 
 @app.route("/create_request", methods=["POST"])
+@rate_limiter.limit(per_ip=WRITE_IP_LIMIT, per_user=WRITE_USER_LIMIT)
 @login_required
 def create_request():
     name = request.form["name"]
@@ -500,14 +900,24 @@ def create_request():
     hostel = request.form["hostel"]
 
     conn = get_db_connection()
-    cur = conn.cursor()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
     
     try:
+        key = get_idempotency_key()
+        previous = claim_idempotency_key(cur, key) if key else None
+        if previous:
+            if key_reused_elsewhere(previous):
+                return KEY_REUSED_MESSAGE, 422
+            return redirect(feed_url())
+        
         cur.execute(
-            'INSERT INTO requests (user_id, name, mobile, item, hostel) VALUES (%s, %s, %s, %s, %s)',
+            'INSERT INTO requests (user_id, name, mobile, item, hostel) VALUES (%s, %s, %s, %s, %s) RETURNING id',
             (current_user.id, name, mobile, item, hostel)
         )
+        if key:
+            record_idempotent_result(cur, key, cur.fetchone()['id'])
         conn.commit()
+        listings_changed()
     except Exception as e:
         print(f"Error creating request: {e}")
         conn.rollback()
@@ -515,7 +925,7 @@ def create_request():
         cur.close()
         conn.close()
 
-    return redirect(url_for("index"))
+    return redirect(feed_url())
 
 @app.route("/edit_barter/<int:id>", methods=["GET", "POST"])
 @login_required
@@ -532,6 +942,7 @@ def edit_barter(id):
         conn.commit()
         cur.close()
         conn.close()
+        listings_changed()
         return redirect(url_for("index"))
     
     cur.execute('SELECT * FROM barters WHERE id = %s AND user_id = %s', (id, current_user.id))
@@ -559,6 +970,7 @@ def edit_request(id):
         conn.commit()
         cur.close()
         conn.close()
+        listings_changed()
         return redirect(url_for("index"))
     
     cur.execute('SELECT * FROM requests WHERE id = %s AND user_id = %s', (id, current_user.id))
@@ -583,6 +995,7 @@ def delete_barter(id):
     conn.commit()
     cur.close()
     conn.close()
+    listings_changed()
     return redirect(url_for("index"))
 
 @app.route("/delete_request/<int:id>")
@@ -597,8 +1010,241 @@ def delete_request(id):
     conn.commit()
     cur.close()
     conn.close()
+    listings_changed()
     return redirect(url_for("index"))
 
+# --- JSON API (v1) ---
+# Small JSON payloads for mobile clients and in-page fetch(); the session cookie
+# from /login authenticates. Lists support ?fields=, ?limit= and ?before=<id>.
+LISTING_FIELDS = {
+    'id': 'l.id',
+    'item': 'l.item',
+    'name': 'l.name',
+    'mobile': 'l.mobile',
+    'hostel': 'l.hostel',
+    'created_at': 'l.created_at',
+    'username': 'u.username',
+}
+
+OFFER_FIELDS = {
+    'id': 'toff.id',
+    'barter_id': 'toff.barter_id',
+    'barter_item': 'toff.barter_item',
+    'barter_owner': 'toff.barter_owner',
+    'offerer_name': 'toff.offerer_name',
+    'offerer_mobile': 'toff.offerer_mobile',
+    'item_description': 'toff.item_description',
+    'status': 'toff.status',
+    'created_at': 'toff.created_at',
+}
+
+RECEIVED_OFFER_FIELDS = {
+    'id': 'ro.id',
+    'trade_offer_id': 'toff.id',
+    'barter_id': 'toff.barter_id',
+    'barter_item': 'toff.barter_item',
+    'offerer_name': 'toff.offerer_name',
+    'offerer_mobile': 'toff.offerer_mobile',
+    'offerer_username': 'u_offerer.username',
+    'item_description': 'toff.item_description',
+    'status': 'ro.status',
+    'created_at': 'ro.created_at',
+}
+
+OFFER_STATUSES = ('pending', 'accepted', 'rejected')
+
+def api_login_required(view):
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        if not current_user.is_authenticated:
+            return error_response("Authentication required", 401)
+        try:
+            return view(*args, **kwargs)
+        except ApiError as e:
+            return error_response(e.message, e.status)
+        except HTTPException as e:
+            return error_response(e.description, e.code)
+        except Exception as e:
+            # API clients get the JSON error contract, not Flask's HTML error page
+            print(f"❌ API error on {request.path}: {e}")
+            return error_response("Internal server error", 500)
+    return wrapped
+
+def api_rate_limited():
+    return error_response("Too many requests, please slow down and try again shortly.", 429)
+
+def fetch_page(sql, params, limit):
+    conn = get_db_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        cur.execute(sql, params + [limit + 1])
+        return page(cur.fetchall(), limit)
+    finally:
+        cur.close()
+        conn.close()
+
+def list_listings(table):
+    names, columns = select_fields(LISTING_FIELDS)
+    limit, before = page_args()
+    
+    # Only join users when the username is asked for
+    join = 'JOIN users u ON l.user_id = u.id' if 'username' in names else ''
+    where = ['l.is_active = TRUE']
+    params = []
+    if request.args.get('hostel'):
+        where.append('l.hostel = %s')
+        params.append(request.args['hostel'])
+    if before is not None:
+        where.append('l.id < %s')
+        params.append(before)
+    
+    # table is one of two literals chosen by the route, never user input
+    return json_response(fetch_page(f'''
+        SELECT {columns}
+        FROM {table} l {join}
+        WHERE {' AND '.join(where)}
+        ORDER BY l.id DESC
+        LIMIT %s
+    ''', params, limit))
+
+@app.route("/api/v1/barters")
+@api_login_required
+def api_list_barters():
+    return list_listings('barters')
+
+@app.route("/api/v1/requests")
+@api_login_required
+def api_list_requests():
+    return list_listings('requests')
+
+@app.route("/api/v1/offers")
+@api_login_required
+def api_list_offers():
+    _, columns = select_fields(OFFER_FIELDS)
+    limit, before = page_args()
+    
+    where = ['toff.user_id = %s']
+    params = [current_user.id]
+    if before is not None:
+        where.append('toff.id < %s')
+        params.append(before)
+    
+    return json_response(fetch_page(f'''
+        SELECT {columns}
+        FROM trade_offers toff
+        WHERE {' AND '.join(where)}
+        ORDER BY toff.id DESC
+        LIMIT %s
+    ''', params, limit))
+
+@app.route("/api/v1/offers/received")
+@api_login_required
+def api_list_received_offers():
+    names, columns = select_fields(RECEIVED_OFFER_FIELDS)
+    limit, before = page_args()
+    
+    join = 'JOIN users u_offerer ON toff.user_id = u_offerer.id' if 'offerer_username' in names else ''
+    where = ['ro.receiver_user_id = %s']
+    params = [current_user.id]
+    if request.args.get('status'):
+        where.append('ro.status = %s')
+        params.append(request.args['status'])
+    if before is not None:
+        where.append('ro.id < %s')
+        params.append(before)
+    
+    return json_response(fetch_page(f'''
+        SELECT {columns}
+        FROM received_trade_offers ro
+        JOIN trade_offers toff ON ro.trade_offer_id = toff.id {join}
+        WHERE {' AND '.join(where)}
+        ORDER BY ro.id DESC
+        LIMIT %s
+    ''', params, limit))
+
+@app.route("/api/v1/hostels")
+@api_login_required
+def api_hostel_counts():
+    conn = get_db_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        counts = cached_hostel_counts(cur)
+    finally:
+        cur.close()
+        conn.close()
+    
+    return json_response({'data': [
+        {'hostel': h, 'barters': counts.get(h, {}).get('barters', 0),
+         'requests': counts.get(h, {}).get('requests', 0)}
+        for h in HOSTELS
+    ]})
+
+@app.route("/api/v1/barters/<int:barter_id>/offers", methods=["POST"])
+@rate_limiter.limit(per_ip=WRITE_IP_LIMIT, per_user=WRITE_USER_LIMIT, on_limit=api_rate_limited)
+@api_login_required
+def api_create_offer(barter_id):
+    data = request_data()
+    missing = [key for key in ('name', 'mobile', 'item_description') if not data.get(key)]
+    if missing:
+        raise ApiError(f"Missing field(s): {', '.join(missing)}")
+    
+    conn = get_db_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        key = get_idempotency_key()
+        previous = claim_idempotency_key(cur, key) if key else None
+        if previous:
+            if key_reused_elsewhere(previous):
+                return error_response(KEY_REUSED_MESSAGE, 422)
+            # Report the offer as it is now; it may have been accepted or rejected since
+            cur.execute('SELECT status FROM trade_offers WHERE id = %s', (previous['result_id'],))
+            offer = cur.fetchone()
+            status = offer['status'] if offer else 'pending'
+            response = json_response({'id': previous['result_id'], 'status': status}, 201)
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+        
+        trade_offer_id = insert_trade_offer(
+            cur, barter_id, data['name'], data['mobile'], data['item_description']
+        )
+        if trade_offer_id is None:
+            return error_response("Barter not found", 404)
+        if key:
+            record_idempotent_result(cur, key, trade_offer_id)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+    
+    return json_response({'id': trade_offer_id, 'status': 'pending'}, 201)
+
+@app.route("/api/v1/offers/received/<int:received_offer_id>/status", methods=["POST"])
+@api_login_required
+def api_update_offer_status(received_offer_id):
+    data = request_data()
+    status = data.get('status')
+    if status not in OFFER_STATUSES:
+        raise ApiError(f"status must be one of: {', '.join(OFFER_STATUSES)}")
+    
+    conn = get_db_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        updated = set_offer_status(cur, received_offer_id, status)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+    
+    if not updated:
+        return error_response("Offer not found", 404)
+    return json_response({'id': received_offer_id, 'status': status})
+
 # Debug route to check database state
 @app.route("/debug/offers")
 @login_required
@@ -706,6 +1352,11 @@ def debug_offers():
     
     return debug_html
 
+# Monitoring endpoint for scrapers (no login, exposes counters only)
+@app.route("/metrics")
+def metrics():
+    return rate_limiter.metrics(), 200, {'Content-Type': 'text/plain; version=0.0.4'}
+
 # Create default admin user if not exists
 def create_default_admin():
     conn = get_db_connection()
@@ -729,6 +1380,7 @@ def create_default_admin():
         conn.close()
 
 create_default_admin()
+warm_templates()
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
@@ -0,0 +1,128 @@
+"""Render-time benchmark for the index() page.
+
+Measures the cost of building the listings page from a large result set,
+without a database: psycopg2.connect is replaced by an in-memory connection
+that returns generated rows, so only Flask/Jinja work is timed.
+
+The fake rows already carry search_text, which the real query computes with
+lower() in PostgreSQL. That work is not timed here, so comparisons with
+versions that lowercased in the template overstate the gain. Timings are
+noisy on small or shared machines: alternate runs of the versions being
+compared and look at the spread, not a single median.
+
+    python benchmarks/bench_index_render.py --rows 5000 --repeat 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+import psycopg2
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOSTELS = ['A', 'B', 'C', 'D', 'E', 'G', 'I', 'J', 'K', 'L', 'M', 'N', 'O', 'PG', 'Q']
+
+
+def make_rows(count, prefix):
+    now = datetime(2025, 1, 1)
+    rows = []
+    for i in range(count):
+        row = {
+            'id': i + 1,
+            'user_id': i % 50 + 1,
+            'name': f'Student {i}',
+            'mobile': f'98765{i:05d}',
+            'item': f'{prefix} item number {i}',
+            'hostel': HOSTELS[i % len(HOSTELS)],
+            'created_at': now - timedelta(minutes=i),
+            'is_active': True,
+            'username': f'user{i % 50 + 1}',
+        }
+        row['search_text'] = f"{row['name']} {row['item']} {row['hostel']}".lower()
+        rows.append(row)
+    return rows
+
+
+class FakeCursor:
+    def __init__(self, data):
+        self.data = data
+        self.result = []
+
+    def execute(self, sql, params=None):
+        sql = ' '.join(sql.split())
+        if 'FROM barters' in sql and 'COUNT' not in sql:
+            self.result = self.data['barters']
+        elif 'FROM requests' in sql:
+            self.result = self.data['requests']
+        elif 'COUNT(*)' in sql:
+            self.result = [{'count': 3}]
+        elif 'FROM users' in sql:
+            self.result = [{'id': 1, 'username': 'user1', 'email': 'user1@example.com',
+                            'password_hash': 'x'}]
+        else:
+            self.result = []
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, data):
+        self.data = data
+
+    def cursor(self, cursor_factory=None):
+        return FakeCursor(self.data)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5000, help='barters and requests each')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    data = {'barters': make_rows(args.rows, 'Barter'), 'requests': make_rows(args.rows, 'Request')}
+    psycopg2.connect = lambda *a, **k: FakeConnection(data)
+
+    sys.path.insert(0, ROOT)
+    from app import app
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = '1'
+
+    start = time.perf_counter()
+    response = client.get('/')
+    first = time.perf_counter() - start
+    assert response.status_code == 200, response.status_code
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        client.get('/')
+        timings.append(time.perf_counter() - start)
+
+    print(f"rows: {args.rows} barters + {args.rows} requests, page size {len(response.data) / 1024:.0f} KiB")
+    print(f"first request: {first * 1000:.1f} ms")
+    print(f"median:        {statistics.median(timings) * 1000:.1f} ms")
+    print(f"min:           {min(timings) * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
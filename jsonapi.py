@@ -0,0 +1,105 @@
+import gzip
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask import Response, request
+
+try:
+    import orjson
+except ImportError:  # fall back to the standard library
+    orjson = None
+
+# Bodies smaller than this are not worth the CPU to compress
+GZIP_MIN_BYTES = 1024
+GZIP_LEVEL = 5
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def _default(obj):
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(payload):
+    """Serialize to compact UTF-8 JSON bytes. RealDictCursor rows are plain dicts."""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default)
+    return json.dumps(payload, default=_default, separators=(',', ':'),
+                      ensure_ascii=False).encode('utf-8')
+
+
+def json_response(payload, status=200):
+    body = dumps(payload)
+    headers = {'Vary': 'Accept-Encoding'}
+    if len(body) >= GZIP_MIN_BYTES and request.accept_encodings.quality('gzip') > 0:
+        body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+        headers['Content-Encoding'] = 'gzip'
+    return Response(body, status=status, headers=headers, mimetype='application/json')
+
+
+def error_response(message, status):
+    return json_response({'error': message}, status)
+
+
+def request_data():
+    """The request's JSON object, or its form fields when the body is not JSON."""
+    data = request.get_json(silent=True)
+    if data is None:
+        return request.form
+    if not isinstance(data, dict):
+        raise ApiError("JSON object required")
+    return data
+
+
+def select_fields(columns, default=None):
+    """Pick the SQL expressions for ?fields=a,b from a whitelist of name -> expression.
+
+    ``id`` is always returned because it is the pagination cursor.
+    """
+    raw = request.args.get('fields')
+    if raw:
+        names = [name.strip() for name in raw.split(',') if name.strip()]
+        unknown = [name for name in names if name not in columns]
+        if unknown:
+            raise ApiError(f"Unknown field(s): {', '.join(unknown)}")
+    else:
+        names = list(default or columns)
+    if 'id' not in names:
+        names.insert(0, 'id')
+    return names, ', '.join(f'{columns[name]} AS {name}' for name in names)
+
+
+def page_args():
+    """Read ?limit= and the keyset cursor ?before=<id> (rows are newest first)."""
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+        before = request.args.get('before')
+        before = int(before) if before is not None else None
+    except ValueError:
+        raise ApiError("limit and before must be integers")
+    if limit < 1:
+        raise ApiError("limit must be positive")
+    return min(limit, MAX_PAGE_SIZE), before
+
+
+def page(rows, limit):
+    """Build a page from a query that fetched limit + 1 rows."""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        'data': rows,
+        'next_before': rows[-1]['id'] if has_more else None,
+    }
@@ -0,0 +1,241 @@
+import itertools
+import sqlite3
+import threading
+import time
+from collections import defaultdict, namedtuple
+from functools import wraps
+
+from flask import request, session
+
+# A limit of `requests` per `seconds`; the bucket also allows a burst of `requests`.
+Limit = namedtuple('Limit', ['requests', 'seconds'])
+
+# Buckets untouched for this long are full again and can be dropped
+IDLE_SECONDS = 3600
+PRUNE_EVERY = 1000
+
+
+def refill(tokens, updated, now, limit):
+    """Top a bucket up for the time elapsed since it was last touched."""
+    rate = limit.requests / limit.seconds
+    return min(limit.requests, tokens + max(0.0, now - updated) * rate)
+
+
+def take_token(tokens, updated, now, limit):
+    """Return (allowed, tokens_left, retry_after) for one request."""
+    tokens = refill(tokens, updated, now, limit)
+    if tokens >= 1:
+        return True, tokens - 1, 0
+    rate = limit.requests / limit.seconds
+    return False, tokens, (1 - tokens) / rate
+
+
+class MemoryBucketStore:
+    """Token buckets kept in this worker's memory."""
+
+    IDLE_SECONDS = IDLE_SECONDS
+    PRUNE_EVERY = PRUNE_EVERY
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._calls = 0
+
+    def take(self, key, limit, now):
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (limit.requests, now))
+            allowed, tokens, retry_after = take_token(tokens, updated, now, limit)
+            self._buckets[key] = (tokens, now)
+
+            self._calls += 1
+            if self._calls % self.PRUNE_EVERY == 0:
+                self._prune(now)
+            return allowed, retry_after
+
+    def _prune(self, now):
+        stale = [k for k, (_, updated) in self._buckets.items()
+                 if now - updated > self.IDLE_SECONDS]
+        for key in stale:
+            del self._buckets[key]
+
+
+class SQLiteBucketStore:
+    """Token buckets in a local SQLite file, shared by every worker on the host."""
+
+    IDLE_SECONDS = IDLE_SECONDS
+    PRUNE_EVERY = PRUNE_EVERY
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._calls = itertools.count(1)
+        conn = self._connection()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS rate_buckets (
+                key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL
+            )
+        ''')
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def take(self, key, limit, now):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT tokens, updated FROM rate_buckets WHERE key = ?', (key,)
+            ).fetchone()
+            tokens, updated = row if row else (limit.requests, now)
+            allowed, tokens, retry_after = take_token(tokens, updated, now, limit)
+            conn.execute(
+                'INSERT OR REPLACE INTO rate_buckets (key, tokens, updated) VALUES (?, ?, ?)',
+                (key, tokens, now)
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        if next(self._calls) % self.PRUNE_EVERY == 0:
+            conn.execute('DELETE FROM rate_buckets WHERE updated < ?', (now - self.IDLE_SECONDS,))
+        return allowed, retry_after
+
+
+class RedisBucketStore:
+    """Token buckets in a Redis-protocol server, shared by every instance.
+
+    The refill-and-take runs as one Lua script so concurrent instances
+    cannot both spend the last token.
+    """
+
+    SCRIPT = """
+        local limit, period = tonumber(ARGV[1]), tonumber(ARGV[2])
+        -- The server clock, so instances with skewed clocks agree on refills
+        local time = redis.call('TIME')
+        local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+        local rate = limit / period
+        local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+        local tokens = tonumber(state[1]) or limit
+        local updated = tonumber(state[2]) or now
+        tokens = math.min(limit, tokens + math.max(0, now - updated) * rate)
+        local allowed = 0
+        local retry_after = 0
+        if tokens >= 1 then
+            tokens = tokens - 1
+            allowed = 1
+        else
+            retry_after = (1 - tokens) / rate
+        end
+        redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+        redis.call('EXPIRE', KEYS[1], math.ceil(period * 2))
+        return {allowed, tostring(retry_after)}
+    """
+
+    def __init__(self, client, prefix='ratelimit:'):
+        self.prefix = prefix
+        self._take = client.register_script(self.SCRIPT)
+
+    def take(self, key, limit, now):
+        allowed, retry_after = self._take(
+            keys=[self.prefix + key], args=[limit.requests, limit.seconds]
+        )
+        return bool(allowed), float(retry_after)
+
+
+class RateLimiter:
+    """Per-route token-bucket throttling keyed by client IP and logged-in user.
+
+    The check only reads the request's address and the session cookie, so it
+    rejects a request before the view (or Flask-Login's user loader) touches
+    the database. Apply it above ``@login_required`` to keep it that way.
+    """
+
+    def __init__(self, store=None, enabled=True):
+        self.store = store if store is not None else MemoryBucketStore()
+        self.enabled = enabled
+        self.counters = defaultdict(int)
+        self._counter_lock = threading.Lock()
+
+    def limit(self, per_ip=None, per_user=None, per_account=None, account=None,
+              methods=('POST',), on_limit=None):
+        """Throttle a view per client IP, per logged-in user and/or per account.
+
+        ``account`` is a callable returning the key of the account a request
+        targets (for a login form, the submitted username with the client IP),
+        limited by ``per_account``; a falsy key skips the check.
+        ``on_limit`` builds the 429 response; the default is a plain-text message.
+        """
+        def decorator(view):
+            route = view.__name__
+
+            @wraps(view)
+            def wrapped(*args, **kwargs):
+                if self.enabled and request.method in methods:
+                    retry_after = self._check(route, per_ip, per_user, per_account, account)
+                    if retry_after is not None:
+                        return self._too_many(on_limit, retry_after)
+                return view(*args, **kwargs)
+            return wrapped
+        return decorator
+
+    def _too_many(self, on_limit, retry_after):
+        headers = {'Retry-After': str(max(1, int(retry_after + 0.5)))}
+        if on_limit is None:
+            return 'Too many requests, please slow down and try again shortly.', 429, headers
+        response = on_limit()
+        response.status_code = 429
+        response.headers.update(headers)
+        return response
+
+    def _check(self, route, per_ip, per_user, per_account, account):
+        now = time.time()
+        scopes = []
+        if per_ip:
+            scopes.append(('ip', request.remote_addr or 'unknown', per_ip))
+        # Flask-Login keeps the user id in the session; reading it avoids load_user()
+        user_id = session.get('_user_id')
+        if per_user and user_id:
+            scopes.append(('user', user_id, per_user))
+        account_id = account() if per_account and account else None
+        if account_id:
+            scopes.append(('account', account_id, per_account))
+
+        for scope, ident, limit in scopes:
+            try:
+                allowed, retry_after = self.store.take(f'{route}:{scope}:{ident}', limit, now)
+            except Exception as e:
+                # Never take the site down because the limiter's store is unavailable
+                print(f"Rate limiter store error: {e}")
+                self._count(route, scope, 'error')
+                continue
+            if not allowed:
+                self._count(route, scope, 'rejected')
+                return retry_after
+            self._count(route, scope, 'allowed')
+        return None
+
+    def _count(self, route, scope, outcome):
+        with self._counter_lock:
+            self.counters[(route, scope, outcome)] += 1
+
+    def metrics(self):
+        """Counters in the Prometheus text exposition format."""
+        with self._counter_lock:
+            items = sorted(self.counters.items())
+        lines = [
+            '# HELP campustrade_rate_limit_checks_total Rate limiter decisions by route, scope and outcome.',
+            '# TYPE campustrade_rate_limit_checks_total counter',
+        ]
+        for (route, scope, outcome), value in items:
+            lines.append(
+                f'campustrade_rate_limit_checks_total{{route="{route}",scope="{scope}",outcome="{outcome}"}} {value}'
+            )
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,287 @@
+import json
+import secrets
+import threading
+import time
+from collections import defaultdict
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SecureCookieSession, SessionInterface
+from itsdangerous import BadSignature, Signer
+
+try:
+    import redis
+except ImportError:  # only needed for redis:// stores
+    redis = None
+
+INVALIDATION_CHANNEL = 'campustrade:invalidate'
+
+
+class MemoryStore:
+    """Key/value store and message bus local to this process.
+
+    The default for a single instance; behaves like RedisStore so the app
+    code does not care which one is configured.
+    """
+
+    shared = False
+
+    def __init__(self):
+        self._data = {}
+        self._subscribers = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires is not None and expires < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def publish(self, channel, message):
+        for callback in list(self._subscribers[channel]):
+            callback(message)
+
+    def subscribe(self, channel, callback):
+        self._subscribers[channel].append(callback)
+
+
+class RedisStore:
+    """Store backed by any server speaking the Redis protocol (Redis, Valkey, KeyDB...)."""
+
+    shared = True
+
+    def __init__(self, url):
+        if redis is None:
+            raise RuntimeError("The redis package is required for a redis:// SHARED_STORE_URL")
+        self.client = redis.Redis.from_url(url)
+        self._pubsub = None
+        self._handlers = {}
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(key, value, ex=int(ttl) if ttl else None)
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*keys)
+
+    def publish(self, channel, message):
+        self.client.publish(channel, message)
+
+    def subscribe(self, channel, callback):
+        self._handlers[channel] = lambda msg: callback(msg['data'].decode('utf-8'))
+        if self._pubsub is None:
+            self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            self._pubsub.subscribe(**self._handlers)
+            self._pubsub.run_in_thread(sleep_time=1.0, daemon=True,
+                                       exception_handler=self._on_pubsub_error)
+        else:
+            self._pubsub.subscribe(**{channel: self._handlers[channel]})
+
+    def _on_pubsub_error(self, error, pubsub, thread):
+        # Keep the listener alive through an outage; redis-py resubscribes when it reconnects
+        print(f"Shared store subscription error: {error}")
+        time.sleep(1.0)
+
+
+def store_from_url(url):
+    """memory:// (or nothing) for a per-process store, redis:// or rediss:// for a shared one."""
+    if not url or url.startswith('memory://'):
+        return MemoryStore()
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisStore(url)
+    raise ValueError(f"Unsupported SHARED_STORE_URL scheme: {url.split(':', 1)[0]}")
+
+
+class SharedCache:
+    """Two-level cache: a short-lived copy in this process over the shared store.
+
+    invalidate() deletes the shared entry and broadcasts the key, so every
+    instance drops its local copy instead of serving stale data until it expires.
+    If the store is unreachable the cache falls back to calling the loader.
+    """
+
+    def __init__(self, store, namespace, ttl=300, local_ttl=30):
+        self.store = store
+        self.namespace = namespace
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self._local = {}
+        self._lock = threading.Lock()
+        store.subscribe(INVALIDATION_CHANNEL, self._on_invalidate)
+
+    def _key(self, key):
+        return f'cache:{self.namespace}:{key}'
+
+    def get(self, key, loader):
+        """Return the cached value for key, calling loader() on a miss.
+
+        A loader result of None is not cached.
+        """
+        key = str(key)
+        now = time.monotonic()
+        with self._lock:
+            item = self._local.get(key)
+        if item is not None and item[1] > now:
+            return item[0]
+
+        raw = self._shared_get(key) if self.store.shared else None
+        if raw is not None:
+            value = json.loads(raw)
+        else:
+            value = loader()
+            if value is None:
+                return None
+            if self.store.shared:
+                self._shared_set(key, json.dumps(value))
+
+        # Without a shared store every write goes through this process, so the full ttl is safe
+        local_ttl = min(self.local_ttl, self.ttl) if self.store.shared else self.ttl
+        with self._lock:
+            self._local[key] = (value, now + local_ttl)
+        return value
+
+    def invalidate(self, key):
+        key = str(key)
+        self._drop(key)
+        try:
+            self.store.delete(self._key(key))
+            self.store.publish(INVALIDATION_CHANNEL, f'{self.namespace}:{key}')
+        except Exception as e:
+            # Other instances keep their local copy until local_ttl runs out
+            print(f"Shared cache error: {e}")
+
+    def _shared_get(self, key):
+        try:
+            return self.store.get(self._key(key))
+        except Exception as e:
+            # Never fail a request because the cache is down; the loader still works
+            print(f"Shared cache error: {e}")
+            return None
+
+    def _shared_set(self, key, raw):
+        try:
+            self.store.set(self._key(key), raw, ttl=self.ttl)
+        except Exception as e:
+            print(f"Shared cache error: {e}")
+
+    def _on_invalidate(self, message):
+        namespace, _, key = message.partition(':')
+        if namespace == self.namespace:
+            self._drop(key)
+
+    def _drop(self, key):
+        with self._lock:
+            self._local.pop(key, None)
+
+
+class StoreSession(SecureCookieSession):
+    def __init__(self, initial=None, sid=None, unavailable=False):
+        super().__init__(initial)
+        self.sid = sid
+        # Set when the store could not be read; such a session is never written back
+        self.unavailable = unavailable
+
+
+class StoreSessionInterface(SessionInterface):
+    """Server-side sessions kept in the shared store; the cookie holds only a signed id.
+
+    Any instance can read a session, and logging out deletes it everywhere.
+
+    When the store is unreachable, requests are served with an empty session:
+    users appear logged out and nothing is saved, but their cookie is left in
+    place so they are logged in again once the store is back.
+    """
+
+    session_class = StoreSession
+    serializer = TaggedJSONSerializer()
+    key_prefix = 'session:'
+
+    def __init__(self, store):
+        self.store = store
+
+    def _signer(self, app):
+        return Signer(app.secret_key, salt='campustrade-session')
+
+    def rotate(self, session):
+        """Give the session a new id (on login) so a pre-login id cannot be fixed by an attacker."""
+        try:
+            self.store.delete(self.key_prefix + session.sid)
+        except Exception as e:
+            # The old id expires with its ttl; the session still moves to a fresh one
+            print(f"Session store error: {e}")
+        session.sid = secrets.token_urlsafe(32)
+        session.modified = True
+
+    def open_session(self, app, request):
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie:
+            try:
+                sid = self._signer(app).unsign(cookie).decode('utf-8')
+            except BadSignature:
+                sid = None
+            if sid:
+                try:
+                    raw = self.store.get(self.key_prefix + sid)
+                except Exception as e:
+                    print(f"Session store error: {e}")
+                    return self.session_class(sid=sid, unavailable=True)
+                if raw is not None:
+                    return self.session_class(self.serializer.loads(raw), sid=sid)
+        return self.session_class(sid=secrets.token_urlsafe(32))
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.accessed:
+            response.vary.add('Cookie')
+        if session.unavailable:
+            return
+
+        if not session:
+            if session.modified:
+                response.delete_cookie(name, domain=domain, path=path)
+                try:
+                    self.store.delete(self.key_prefix + session.sid)
+                except Exception as e:
+                    print(f"Session store error: {e}")
+            return
+
+        if not self.should_set_cookie(app, session):
+            return
+
+        try:
+            self.store.set(self.key_prefix + session.sid, self.serializer.dumps(dict(session)),
+                           ttl=app.permanent_session_lifetime.total_seconds())
+        except Exception as e:
+            # Without a stored session the cookie would point at nothing, so do not send one
+            print(f"Session store error: {e}")
+            return
+        response.set_cookie(
+            name,
+            self._signer(app).sign(session.sid.encode('utf-8')).decode('utf-8'),
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
@@ -0,0 +1,234 @@
+// View Management
+document.querySelectorAll('#viewTabs .nav-link').forEach(tab => {
+  tab.addEventListener('click', (e) => {
+    e.preventDefault();
+    const view = tab.getAttribute('data-view');
+    
+    // Update active tab
+    document.querySelectorAll('#viewTabs .nav-link').forEach(t => t.classList.remove('active'));
+    tab.classList.add('active');
+    
+    // Show/hide views
+    document.getElementById('barters-view').style.display = view === 'barters' ? 'block' : 'none';
+    document.getElementById('requests-view').style.display = view === 'requests' ? 'block' : 'none';
+    
+    // Apply current filters to the new view
+    applyFilters();
+  });
+});
+
+// Search and Filter Functionality
+const searchInput = document.getElementById('searchInput');
+const hostelFilter = document.getElementById('hostelFilter');
+const activeFilters = document.getElementById('activeFilters');
+const filterBadges = document.getElementById('filterBadges');
+
+searchInput.addEventListener('input', applyFilters);
+// Hostels have their own server-rendered feed, so picking one loads only that hostel's rows
+hostelFilter.addEventListener('change', () => {
+  window.location.href = hostelFilter.value ? `/hostel/${encodeURIComponent(hostelFilter.value)}` : '/';
+});
+
+function applyFilters() {
+  const searchTerm = searchInput.value.toLowerCase();
+  const selectedHostel = hostelFilter.value;
+  const currentView = document.querySelector('#viewTabs .nav-link.active').getAttribute('data-view');
+  
+  const items = document.querySelectorAll(`.${currentView.slice(0, -1)}-item`);
+  let visibleCount = 0;
+
+  items.forEach(item => {
+    const searchData = item.getAttribute('data-search');
+    const itemHostel = item.getAttribute('data-hostel');
+    
+    const matchesSearch = searchData.includes(searchTerm);
+    const matchesHostel = !selectedHostel || itemHostel === selectedHostel;
+    
+    if (matchesSearch && matchesHostel) {
+      item.style.display = '';
+      visibleCount++;
+    } else {
+      item.style.display = 'none';
+    }
+  });
+
+  // Update empty states
+  updateEmptyState(currentView, visibleCount);
+  
+  // Update active filters display
+  updateActiveFilters(searchTerm, selectedHostel);
+}
+
+function updateEmptyState(view, visibleCount) {
+  const container = document.getElementById(`${view}-container`);
+  const emptyState = container.querySelector('.empty-state');
+  const table = container.querySelector('table');
+  
+  if (visibleCount === 0 && table) {
+    if (!emptyState) {
+      const emptyHtml = `
+        <div class="empty-state">
+          <i class="bi bi-search"></i>
+          <h5>No matching items found</h5>
+          <p class="text-muted">Try adjusting your search or filters</p>
+          <button class="btn btn-outline-secondary" onclick="clearFilters()">
+            Clear Filters
+          </button>
+        </div>
+      `;
+      table.style.display = 'none';
+      container.insertAdjacentHTML('beforeend', emptyHtml);
+    }
+  } else {
+    if (emptyState) {
+      emptyState.remove();
+    }
+    if (table) {
+      table.style.display = '';
+    }
+  }
+}
+
+function updateActiveFilters(searchTerm, selectedHostel) {
+  const filters = [];
+  
+  if (searchTerm) {
+    filters.push(`Search: "${searchTerm}"`);
+  }
+  if (selectedHostel) {
+    filters.push(`Hostel: ${selectedHostel}`);
+  }
+  
+  if (filters.length > 0) {
+    filterBadges.innerHTML = filters.map(filter => 
+      `<span class="badge bg-primary filter-badge me-1">${filter}</span>`
+    ).join('');
+    activeFilters.style.display = 'block';
+  } else {
+    activeFilters.style.display = 'none';
+  }
+}
+
+function clearFilters() {
+  searchInput.value = '';
+  if (hostelFilter.dataset.current) {
+    window.location.href = '/';
+    return;
+  }
+  hostelFilter.value = '';
+  applyFilters();
+}
+
+// Form Management
+function showView(view) {
+  // Handled by tab system now
+}
+
+function toggleForm(formType) {
+  if (formType === 'barter') {
+    document.getElementById('barter-form').style.display = 'block';
+    document.getElementById('request-form').style.display = 'none';
+  } else {
+    document.getElementById('barter-form').style.display = 'none';
+    document.getElementById('request-form').style.display = 'block';
+  }
+}
+
+function hideForms() {
+  document.getElementById('barter-form').style.display = 'none';
+  document.getElementById('request-form').style.display = 'none';
+}
+
+// Trade Offer Functionality
+// One key per opened modal: double clicks and retries of the same offer are deduplicated server-side
+let tradeOfferKey = null;
+
+function newIdempotencyKey() {
+  if (window.crypto && crypto.randomUUID) {
+    return crypto.randomUUID();
+  }
+  return Date.now().toString(36) + Math.random().toString(36).slice(2);
+}
+
+function initiateTradeOffer(barterId, itemName) {
+  tradeOfferKey = newIdempotencyKey();
+  document.getElementById('selectedBarterId').value = barterId;
+  document.getElementById('barterItemName').textContent = itemName;
+  
+  document.getElementById('offererName').value = '';
+  document.getElementById('offererMobile').value = '';
+  document.getElementById('itemDescription').value = '';
+  
+  const modal = new bootstrap.Modal(document.getElementById('tradeOfferModal'));
+  modal.show();
+}
+
+function submitTradeOffer() {
+  const barterId = document.getElementById('selectedBarterId').value;
+  const name = document.getElementById('offererName').value;
+  const mobile = document.getElementById('offererMobile').value;
+  const itemDescription = document.getElementById('itemDescription').value;
+  
+  if (!name || !mobile || !itemDescription) {
+    alert('Please fill in all fields');
+    return;
+  }
+  
+  const formData = new FormData();
+  formData.append('name', name);
+  formData.append('mobile', mobile);
+  formData.append('item_description', itemDescription);
+  
+  const sendButton = document.getElementById('sendTradeOfferBtn');
+  if (sendButton.disabled) {
+    return;
+  }
+  sendButton.disabled = true;
+  
+  fetch(`/create_trade_offer/${barterId}`, {
+    method: 'POST',
+    headers: { 'Idempotency-Key': tradeOfferKey },
+    body: formData
+  })
+  .then(response => {
+    if (response.ok) {
+      const modal = bootstrap.Modal.getInstance(document.getElementById('tradeOfferModal'));
+      modal.hide();
+      alert('Trade offer sent successfully!');
+    } else {
+      alert('Error sending trade offer');
+    }
+  })
+  .catch(error => {
+    console.error('Error:', error);
+    alert('Error sending trade offer');
+  })
+  .finally(() => {
+    sendButton.disabled = false;
+  });
+}
+
+// Close forms when clicking outside
+document.addEventListener('click', function(event) {
+  const barterForm = document.getElementById('barter-form');
+  const requestForm = document.getElementById('request-form');
+  const createBarterBtn = document.querySelector('.btn-success');
+  const createRequestBtn = document.querySelector('.btn-info');
+  
+  if (barterForm.style.display === 'block' && 
+      !barterForm.contains(event.target) && 
+      event.target !== createBarterBtn) {
+    hideForms();
+  }
+  
+  if (requestForm.style.display === 'block' && 
+      !requestForm.contains(event.target) && 
+      event.target !== createRequestBtn) {
+    hideForms();
+  }
+});
+
+// Initialize
+document.addEventListener('DOMContentLoaded', function() {
+  applyFilters();
+});